@@ -2,13 +2,28 @@
 
 from google.adk import Agent
 from google.adk.tools import load_artifacts
-from .tools import generate_image, generate_video, upload_image_to_gcs
+from .tools import (
+    generate_image,
+    generate_image_and_upload,
+    generate_video,
+    generate_videos_batch,
+    poll_video_batch,
+    upload_image_to_gcs,
+)
 
-MODEL = "gemini-2.5-pro-preview-05-06" 
+MODEL = "gemini-2.5-pro-preview-05-06"
 
 root_agent = Agent(
     model=MODEL,
     name="content_agent",
     instruction="You are an agent whose job is to generate or edit an image or video based on the prompt provided",
-    tools=[generate_image, generate_video, upload_image_to_gcs, load_artifacts],
+    tools=[
+        generate_image,
+        generate_image_and_upload,
+        generate_video,
+        generate_videos_batch,
+        poll_video_batch,
+        upload_image_to_gcs,
+        load_artifacts,
+    ],
 )
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""Coalesces concurrent async calls into batches.
+
+Submissions are collected until the batch is full or a short queue window
+expires, then handed to process_batch as one unit. Callers just await
+submit() and get their individual result back, so batching stays
+transparent to them.
+"""
+
+import asyncio
+
+
+class AsyncBatcher:
+    """Collects submitted items and processes them in batches.
+
+    Subclasses implement process_batch, which receives the batched items and
+    returns one result per item, in order.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_queue_time: float = 0.05):
+        self._max_batch_size = max_batch_size
+        self._max_queue_time = max_queue_time
+        self._pending = []  # list of (item, future) pairs
+        self._flush_task = None
+
+    async def submit(self, item):
+        """Queues an item and waits for its result from the next batch.
+
+        Args:
+            item: The item to include in the next batch.
+
+        Returns:
+            The result process_batch produced for this item.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        return await future
+
+    async def _delayed_flush(self):
+        """Flushes the pending batch once the queue window expires."""
+        try:
+            await asyncio.sleep(self._max_queue_time)
+        except asyncio.CancelledError:
+            return
+        self._flush_task = None
+        self._flush()
+
+    def _flush(self):
+        """Kicks off processing of everything queued so far."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        batch = self._pending
+        self._pending = []
+        if batch:
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        """Runs process_batch and routes results back to each waiter."""
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def process_batch(self, items: list) -> list:
+        """Processes a batch of items, returning one result per item."""
+        raise NotImplementedError
@@ -0,0 +1,91 @@
+"""Two-tier prompt cache for generated images.
+
+Tier 1 is an exact-match lookup keyed by a SHA-256 hash of the normalized
+prompt and model name. Tier 2 is a semantic lookup that compares prompt
+embeddings by cosine similarity, so near-duplicate prompts reuse the same
+image instead of triggering another Imagen call.
+"""
+
+import hashlib
+import json
+import math
+from collections import OrderedDict
+
+# Minimum cosine similarity for a semantic-tier hit.
+SIMILARITY_THRESHOLD = 0.92
+
+
+def make_cache_key(model: str, prompt: str) -> str:
+    """Builds the exact-match cache key for a prompt.
+
+    Args:
+        model (str): The model name the prompt is generated with.
+        prompt (str): The prompt to key on.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the normalized (model, prompt) pair.
+    """
+    payload = json.dumps(
+        {"model": model, "prompt": prompt.strip().lower()}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cosine_similarity(a: list, b: list) -> float:
+    """Computes the cosine similarity between two embedding vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class ImageCache:
+    """In-memory LRU cache with an exact tier and a semantic tier.
+
+    Entries map cache key -> image bytes. When an embedding is provided it is
+    kept alongside the key so later lookups can match semantically similar
+    prompts that miss the exact tier.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._embeddings = []  # list of (embedding, key) pairs
+
+    def get(self, key: str, embedding: list = None):
+        """Looks up cached image bytes for a prompt.
+
+        Args:
+            key (str): Exact-match cache key from make_cache_key.
+            embedding (list, optional): Prompt embedding for the semantic tier.
+
+        Returns:
+            bytes | None: The cached image bytes, or None on a miss.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if embedding:
+            best_key, best_score = None, 0.0
+            for cached_embedding, cached_key in self._embeddings:
+                score = _cosine_similarity(embedding, cached_embedding)
+                if score > best_score:
+                    best_key, best_score = cached_key, score
+            if best_key is not None and best_score >= SIMILARITY_THRESHOLD:
+                self._entries.move_to_end(best_key)
+                return self._entries[best_key]
+        return None
+
+    def put(self, key: str, image_bytes: bytes, embedding: list = None):
+        """Stores image bytes under the given key, evicting the LRU entry."""
+        self._entries[key] = image_bytes
+        self._entries.move_to_end(key)
+        if embedding:
+            self._embeddings.append((embedding, key))
+        while len(self._entries) > self._max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._embeddings = [
+                (emb, k) for emb, k in self._embeddings if k != evicted_key
+            ]
@@ -1,21 +1,82 @@
 
 import asyncio
+import functools
+import hashlib
 import logging
 import os
+import random
+import tempfile
+import time
 import uuid
+from collections import Counter
+from typing import Union
 
 from dotenv import load_dotenv
 from google.adk.tools import ToolContext
+from google.api_core import exceptions as api_exceptions
 from google.cloud import storage
-from google.genai import Client, types
+from google.genai import Client, errors, types
+from requests.adapters import HTTPAdapter
+
+from .batcher import AsyncBatcher
+from .cache import ImageCache, make_cache_key
 
 MODEL_IMAGE = "imagen-4.0-generate-preview-05-20"
 MODEL_VIDEO = "veo-2.0-generate-001"
+MODEL_EMBEDDING = "text-embedding-004"
 
 load_dotenv()
 
+# Resolve the artifact bucket once at import instead of re-reading the
+# environment (and re-stripping the scheme) on every call.
+_BUCKET_RAW = os.environ["BUCKET"]
+_BUCKET = _BUCKET_RAW.removeprefix("gs://")
+
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: transient server-side or quota blips.
+_TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.TooManyRequests,
+    errors.ServerError,
+)
+
+def _retry_transient(func):
+    """Retries a remote call on transient errors with jittered backoff.
+
+    Up to 5 attempts with exponential backoff (1s base, 20s cap) and
+    random jitter, so a single 503 doesn't fail the whole agent turn and
+    retries from concurrent calls don't synchronize. The wrapped calls all
+    run in worker threads, so the sleep never blocks the event loop.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = 1
+        for attempt in range(5):
+            try:
+                return func(*args, **kwargs)
+            except _TRANSIENT_ERRORS:
+                if attempt == 4:
+                    raise
+                logger.warning("--- ⚠️ Transient error, retrying remote call. ---")
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, 20)
+    return wrapper
+
+# Part factories with the mime type pre-bound, hoisted out of the per-call
+# (and per-video) hot paths.
+_PART_PNG = functools.partial(types.Part.from_bytes, mime_type="image/png")
+_PART_MP4 = functools.partial(types.Part.from_bytes, mime_type="video/mp4")
+
+def _content_filename(data: bytes, extension: str) -> str:
+    """Builds a filename from a hash of the content itself.
+
+    Identical payloads produce the same name, so regenerated bytes dedupe
+    naturally in GCS, and BLAKE2b is cheaper than a uuid4 entropy read.
+    """
+    return f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{extension}"
+
 # Only Vertex AI supports Imagen 4 for now.
 client = Client(
     vertexai=True,
@@ -23,37 +84,204 @@ client = Client(
     location=os.getenv("GOOGLE_CLOUD_LOCATION"),
 )
 
-async def generate_image(img_prompt: str, tool_context: ToolContext):
-    """Generates an image based on the prompt.
-    
+# Remote model calls wrapped with transient-error retries.
+_generate_images = _retry_transient(client.models.generate_images)
+_generate_videos = _retry_transient(client.models.generate_videos)
+_get_operation = _retry_transient(client.operations.get)
+
+# Shared GCS client so uploads and downloads reuse pooled keep-alive
+# connections instead of redoing auth and the TLS handshake on every call.
+# The default urllib3 pool is small, so mount a larger adapter for the
+# concurrent transfers above.
+_storage_client = storage.Client()
+_storage_client._http.mount(
+    "https://",
+    HTTPAdapter(pool_connections=100, pool_maxsize=100, pool_block=False),
+)
+
+# Cache of previously generated images so repeated (or near-identical)
+# prompts skip the Imagen call entirely.
+image_cache = ImageCache()
+
+class ImagenBatcher(AsyncBatcher):
+    """Coalesces concurrent prompts into batched Imagen requests.
+
+    Imagen takes one prompt per request, so duplicate prompts in a batch
+    share a single request with number_of_images set to the duplicate count.
+    """
+
+    async def process_batch(self, prompts: list) -> list:
+        images_by_prompt = {}
+        for prompt, count in Counter(prompts).items():
+            response = await asyncio.to_thread(
+                _generate_images,
+                model=MODEL_IMAGE,
+                prompt=prompt,
+                config={"number_of_images": count},
+            )
+            images_by_prompt[prompt] = [
+                generated.image.image_bytes
+                for generated in response.generated_images or []
+            ]
+        return [
+            images_by_prompt[prompt].pop() if images_by_prompt[prompt] else None
+            for prompt in prompts
+        ]
+
+imagen_batcher = ImagenBatcher()
+
+# Pending Veo operations from generate_videos_batch, keyed by batch id.
+_video_batches = {}
+
+@_retry_transient
+def _gcs_cache_get(cache_key: str):
+    """Fetches cached image bytes from the GCS cache prefix, if present."""
+    blob = _storage_client.bucket(_BUCKET).blob(f"cache/{cache_key}.png")
+    if blob.exists():
+        return blob.download_as_bytes()
+    return None
+
+@_retry_transient
+def _gcs_cache_put(cache_key: str, image_bytes: bytes):
+    """Persists generated image bytes under the GCS cache prefix.
+
+    Entries live under cache/ so a bucket lifecycle rule (e.g. 30 days) can
+    act as the eviction policy.
+    """
+    blob = _storage_client.bucket(_BUCKET).blob(f"cache/{cache_key}.png")
+    blob.upload_from_string(image_bytes, content_type="image/png")
+
+async def _embed_prompt(prompt: str):
+    """Embeds a prompt for the semantic cache tier, or None on failure."""
+    try:
+        response = await asyncio.to_thread(
+            client.models.embed_content, model=MODEL_EMBEDDING, contents=prompt
+        )
+        return list(response.embeddings[0].values)
+    except Exception:
+        logger.warning("--- ⚠️ Prompt embedding failed, skipping semantic cache. ---")
+        return None
+
+async def generate_image(
+    img_prompts: Union[str, list[str]], tool_context: ToolContext
+):
+    """Generates one image per prompt.
+
+    Duplicate prompts in a batch are collapsed into a single Imagen request
+    with number_of_images set to the duplicate count, so a batch costs one
+    round-trip per unique prompt instead of one per image.
+
     Args:
-        img_prompt (str): The prompt to generate the image from.
+        img_prompts (str | list[str]): The prompt(s) to generate images from.
         tool_context (ToolContext): The tool context.
 
     Returns:
-        dict: Status, detail and the filename of the image.
+        dict: Status, detail and the filenames of the images.
 
     """
-    response = client.models.generate_images(
-        model=MODEL_IMAGE,
-        prompt=img_prompt,
-        config={"number_of_images": 1},
+    prompts = [img_prompts] if isinstance(img_prompts, str) else list(img_prompts)
+    images = [None] * len(prompts)
+    cache_lookups = {}
+    misses = []
+    for i, prompt in enumerate(prompts):
+        # Check the cache before spending an Imagen call on the prompt.
+        if prompt not in cache_lookups:
+            cache_key = make_cache_key(MODEL_IMAGE, prompt)
+            embedding = await _embed_prompt(prompt)
+            cache_lookups[prompt] = (cache_key, embedding)
+        cache_key, embedding = cache_lookups[prompt]
+        cached_bytes = image_cache.get(cache_key, embedding)
+        if cached_bytes is None:
+            # Exact matches survive restarts via the GCS cache tier.
+            cached_bytes = await asyncio.to_thread(_gcs_cache_get, cache_key)
+            if cached_bytes is not None:
+                image_cache.put(cache_key, cached_bytes, embedding)
+        if cached_bytes is not None:
+            logger.info("--- ✅ Cache hit, reusing previously generated image. ---")
+            images[i] = cached_bytes
+        else:
+            misses.append(i)
+    if misses:
+        # The batcher also coalesces prompts from other in-flight tool calls.
+        generated_bytes = await asyncio.gather(
+            *[imagen_batcher.submit(prompts[i]) for i in misses]
+        )
+        for i, image_bytes in zip(misses, generated_bytes):
+            if image_bytes is None:
+                return {
+                    "status": "failed",
+                    "detail": f"Image generation failed for prompt: {prompts[i]}",
+                }
+            images[i] = image_bytes
+            cache_key, embedding = cache_lookups[prompts[i]]
+            image_cache.put(cache_key, image_bytes, embedding)
+            await asyncio.to_thread(_gcs_cache_put, cache_key, image_bytes)
+    filenames = [_content_filename(image_bytes, "png") for image_bytes in images]
+    # Content-hashed names mean identical images share one artifact.
+    await asyncio.gather(
+        *[
+            tool_context.save_artifact(
+                filename,
+                _PART_PNG(data=image_bytes),
+            )
+            for filename, image_bytes in dict(zip(filenames, images)).items()
+        ]
     )
-    if not response.generated_images:
-        return {
-            "status": "failed",
-            "detail": "Image generation failed.",
-        }
-    image_bytes = response.generated_images[0].image.image_bytes
-    filename = f"{uuid.uuid4()}.png"
+    return {
+        "status": "success",
+        "detail": "Images generated successfully and stored in artifacts.",
+        "filenames": filenames,
+    }
+
+async def generate_image_and_upload(img_prompt: str, tool_context: ToolContext):
+    """Generates an image and uploads it straight to GCS in one step.
+
+    The image bytes are streamed to GCS once and the artifact stores the
+    gs:// URI by reference, so the payload is never re-embedded or copied
+    back out of artifact storage the way chaining generate_image with
+    upload_image_to_gcs would.
+
+    Args:
+        img_prompt (str): The prompt to generate the image from.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict: Status, detail, filename and GCS URI of the image.
+    """
+    cache_key = make_cache_key(MODEL_IMAGE, img_prompt)
+    embedding = await _embed_prompt(img_prompt)
+    image_bytes = image_cache.get(cache_key, embedding)
+    if image_bytes is None:
+        # Exact matches survive restarts via the GCS cache tier.
+        image_bytes = await asyncio.to_thread(_gcs_cache_get, cache_key)
+        if image_bytes is not None:
+            image_cache.put(cache_key, image_bytes, embedding)
+    if image_bytes is None:
+        image_bytes = await imagen_batcher.submit(img_prompt)
+        if image_bytes is None:
+            return {
+                "status": "failed",
+                "detail": "Image generation failed.",
+            }
+        image_cache.put(cache_key, image_bytes, embedding)
+        await asyncio.to_thread(_gcs_cache_put, cache_key, image_bytes)
+    filename = _content_filename(image_bytes, "png")
+    blob = _storage_client.bucket(_BUCKET).blob(filename)
+    with blob.open(
+        "wb", content_type="image/png", chunk_size=8 * 1024 * 1024
+    ) as writer:
+        writer.write(memoryview(image_bytes))
+    gcs_uri = f"gs://{_BUCKET}/{filename}"
+    # Save the artifact by reference so the payload isn't embedded twice.
     await tool_context.save_artifact(
         filename,
-        types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
+        types.Part.from_uri(file_uri=gcs_uri, mime_type="image/png"),
     )
     return {
         "status": "success",
-        "detail": "Image generated successfully and stored in artifacts.",
+        "detail": "Image generated and uploaded to GCS.",
         "filename": filename,
+        "gcs_uri": gcs_uri,
     }
 
 async def generate_video(
@@ -83,52 +311,233 @@ async def generate_video(
     gen_config = types.GenerateVideosConfig(
         aspect_ratio=aspect_ratio,
         number_of_videos=number_of_videos,
-        output_gcs_uri=os.environ["BUCKET"],
+        output_gcs_uri=_BUCKET_RAW,
         negative_prompt=negative_prompt,
     )
     # If an existing image is provided, use it to generate the video.
     if existing_image_filename:
-        gcs_location = f"{os.environ['BUCKET']}/{existing_image_filename}"
+        gcs_location = f"{_BUCKET_RAW}/{existing_image_filename}"
         existing_image = types.Image(gcs_uri=gcs_location, mime_type="image/png")
-        operation = client.models.generate_videos(
+        operation = await asyncio.to_thread(
+            _generate_videos,
             model=MODEL_VIDEO,
             prompt=video_prompt,
             image=existing_image,
             config=gen_config,
         )
     else:
-        operation = client.models.generate_videos(
-            model=MODEL_VIDEO, prompt=video_prompt, config=gen_config
+        operation = await asyncio.to_thread(
+            _generate_videos,
+            model=MODEL_VIDEO,
+            prompt=video_prompt,
+            config=gen_config,
         )
-    while not operation.done:
-        logger.info("--- ⏳ Waiting for video generation to be done... ---")
-        await asyncio.sleep(10)
-        operation = client.operations.get(operation)
-        print(operation)
+    operation = await _await_operation(operation, factor=1.5, max_delay=15)
 
     if operation.response:
         # Download and save the generated videos to artifacts.
-        for generated_video in operation.result.generated_videos:
-            video_uri = generated_video.video.uri
-            filename = f"{uuid.uuid4()}.mp4"
-            bucket = os.getenv("BUCKET")
-            video_bytes = download_blob_from_gcs(
-                bucket.replace("gs://", ""),
-                video_uri.replace(bucket, "")[1:],  # get rid of trailing slash
-            )
-            print(f" --- 🗄️ The location for the saved video is here: {filename} --- ")
-            await tool_context.save_artifact(
-                filename,
-                types.Part.from_bytes(data=video_bytes, mime_type="video/mp4"),
-            )
+        filenames = await _save_videos_to_artifacts(
+            operation.result.generated_videos, tool_context
+        )
         return {
             "status": "success",
             "detail": "Video generated successfully and stored in artifacts.",
-            "filename": filename,
+            "filename": filenames[-1],
             }
 
+async def _await_operation(operation, delay: float = 2, factor: float = 2, max_delay: float = 30):
+    """Waits for a Veo operation to complete.
+
+    Polls with exponential backoff so completion is noticed quickly early on
+    without hammering the API on long generations.
+
+    Args:
+        operation: The Veo operation to wait on.
+        delay (float, optional): Initial poll delay in seconds. Defaults to 2.
+        factor (float, optional): Backoff multiplier per poll. Defaults to 2.
+        max_delay (float, optional): Poll delay cap in seconds. Defaults to 30.
+
+    Returns:
+        The completed operation.
+    """
+    while not operation.done:
+        logger.info("--- ⏳ Waiting for video generation to be done... ---")
+        await asyncio.sleep(delay)
+        delay = min(delay * factor, max_delay)
+        operation = await asyncio.to_thread(_get_operation, operation)
+    return operation
+
+async def _download_blob_streamed(bucket_name: str, source_blob_name: str):
+    """Downloads a blob while overlapping GCS reads with local buffering.
+
+    A producer task reads 8 MiB chunks from GCS while a consumer drains a
+    small bounded queue into a spooled temporary file, so the network reads
+    and local writes overlap instead of alternating.
+
+    Args:
+        bucket_name (str): The bucket to download from.
+        source_blob_name (str): The blob to download.
+
+    Returns:
+        bytes: The downloaded blob contents.
+    """
+    blob = _storage_client.bucket(bucket_name).blob(source_blob_name)
+    chunk_size = 8 * 1024 * 1024
+    queue = asyncio.Queue(maxsize=4)
+
+    async def producer():
+        try:
+            reader = await asyncio.to_thread(blob.open, "rb", chunk_size=chunk_size)
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(reader.read, chunk_size)
+                    if not chunk:
+                        break
+                    await queue.put(chunk)
+            finally:
+                await asyncio.to_thread(reader.close)
+        finally:
+            # Always unblock the consumer, even if the download failed.
+            await queue.put(None)
+
+    async def consumer():
+        with tempfile.SpooledTemporaryFile(max_size=chunk_size) as spool:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                await asyncio.to_thread(spool.write, chunk)
+            spool.seek(0)
+            return spool.read()
+
+    _, data = await asyncio.gather(producer(), consumer())
+    return data
+
+async def _save_videos_to_artifacts(generated_videos, tool_context: ToolContext):
+    """Downloads generated videos from GCS and saves them to artifacts.
+
+    Args:
+        generated_videos: The generated videos from a completed Veo operation.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        list[str]: The filenames of the saved video artifacts.
+    """
+    # The downloads are independent I/O, so run them concurrently, each one
+    # streaming through its own producer/consumer pipeline.
+    video_bytes_list = await asyncio.gather(
+        *[
+            _download_blob_streamed(
+                _BUCKET,
+                generated_video.video.uri.replace(_BUCKET_RAW, "")[1:],  # get rid of trailing slash
+            )
+            for generated_video in generated_videos
+        ]
+    )
+    filenames = [
+        _content_filename(video_bytes, "mp4") for video_bytes in video_bytes_list
+    ]
+    for filename in filenames:
+        print(f" --- 🗄️ The location for the saved video is here: {filename} --- ")
+    await asyncio.gather(
+        *[
+            tool_context.save_artifact(
+                filename,
+                _PART_MP4(data=video_bytes),
+            )
+            for filename, video_bytes in zip(filenames, video_bytes_list)
+        ]
+    )
+    return filenames
+
+async def generate_videos_batch(
+    video_prompts: list[str],
+    tool_context: ToolContext,
+    aspect_ratio: str = "16:9",
+    negative_prompt: str = "",
+):
+    """Submits a batch of video generations without waiting for them.
+
+    All Veo operations are kicked off up front and tracked under a batch id
+    stored in the session state; use poll_video_batch afterwards to wait for
+    the results. Suited to non-urgent generations where latency matters less
+    than keeping the agent turn free.
+
+    Args:
+        video_prompts (list[str]): The prompts to generate videos from.
+        tool_context (ToolContext): The tool context.
+        aspect_ratio (str, optional): The aspect ratio of the videos. Defaults to "16:9".
+        negative_prompt (str, optional): The negative prompt to use. Defaults to "".
+
+    Returns:
+        dict: Status, detail and the batch id to poll.
+    """
+    gen_config = types.GenerateVideosConfig(
+        aspect_ratio=aspect_ratio,
+        number_of_videos=1,
+        output_gcs_uri=_BUCKET_RAW,
+        negative_prompt=negative_prompt,
+    )
+    # Fan out all submissions before anything waits on them.
+    operations = await asyncio.gather(
+        *[
+            asyncio.to_thread(
+                _generate_videos,
+                model=MODEL_VIDEO,
+                prompt=video_prompt,
+                config=gen_config,
+            )
+            for video_prompt in video_prompts
+        ]
+    )
+    batch_id = str(uuid.uuid4())
+    _video_batches[batch_id] = operations
+    tool_context.state["video_batch_id"] = batch_id
+    return {
+        "status": "submitted",
+        "detail": f"Submitted {len(operations)} video generations as one batch.",
+        "batch_id": batch_id,
+    }
+
+async def poll_video_batch(tool_context: ToolContext):
+    """Waits for a submitted video batch and stores the results in artifacts.
+
+    Polls with exponential backoff (2s doubling up to a 30s cap) instead of
+    a fixed cadence to avoid wasted wake-ups on long generations.
+
+    Args:
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict: Status, detail and the filenames of the videos.
+    """
+    batch_id = tool_context.state.get("video_batch_id", "")
+    operations = _video_batches.pop(batch_id, None)
+    if not operations:
+        return {
+            "status": "failed",
+            "detail": "No submitted video batch found to poll.",
+        }
+    # Overlap the minutes-long generations into one wall-clock window.
+    operations = await asyncio.gather(
+        *[_await_operation(operation) for operation in operations]
+    )
+    filenames = []
+    for operation in operations:
+        if operation.response:
+            filenames.extend(
+                await _save_videos_to_artifacts(
+                    operation.result.generated_videos, tool_context
+                )
+            )
+    return {
+        "status": "success",
+        "detail": "Video batch completed and stored in artifacts.",
+        "filenames": filenames,
+    }
+
 async def upload_image_to_gcs(
-    filename: str, tool_context: ToolContext, gcs_bucket: str = os.environ["BUCKET"]
+    filename: str, tool_context: ToolContext, gcs_bucket: str = _BUCKET
 ):
     """
     Uploads an image to a GCS bucket.
@@ -140,22 +549,32 @@ async def upload_image_to_gcs(
         str: The GCS URI of the uploaded image.
     """
     gcs_bucket = gcs_bucket.replace("gs://", "")
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(gcs_bucket)
+    bucket = _storage_client.bucket(gcs_bucket)
     blob = bucket.blob(filename)
     # Get the image from ADK artifacts
     image_artifact = await tool_context.load_artifact(filename)
     if image_artifact and image_artifact.inline_data:
         logger.info(f" --- ✅ Successfully loaded latest ADK artifact '{filename}' --- ")
         image_bytes = image_artifact.inline_data.data
-        blob.upload_from_string(image_bytes, content_type="image/png")
+        # Stream straight to GCS so the payload is never re-buffered in
+        # full; larger chunks keep resumable uploads fast for big payloads.
+        with blob.open(
+            "wb", content_type="image/png", chunk_size=8 * 1024 * 1024
+        ) as writer:
+            writer.write(memoryview(image_bytes))
     else:
         logger.info(f" --- ❌ Failed to load ADK artifact '{filename}'. --- ")
     return f"gs://{gcs_bucket}/{filename}"
 
+@_retry_transient
 def download_blob_from_gcs(bucket_name: str, source_blob_name: str):
-    """Downloads a blob from the Google Cloud Storage bucket."""
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
+    """Downloads a blob from the Google Cloud Storage bucket.
+
+    Uses large chunks and skips gzip transcoding and per-chunk CRC32C
+    validation, which otherwise burn CPU on the critical path for
+    multi-hundred-MB videos; GCS validates object integrity server-side.
+    """
+    bucket = _storage_client.bucket(bucket_name)
     blob = bucket.blob(source_blob_name)
-    return blob.download_as_bytes()
\ No newline at end of file
+    blob.chunk_size = 16 * 1024 * 1024
+    return blob.download_as_bytes(raw_download=True, checksum=None)
\ No newline at end of file